@@ -1,17 +1,37 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import os
+import queue
 import threading
+import time
+from collections import deque
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Deque, Dict, List, Optional, Protocol, Tuple
+
+import anyio
+import msgspec
 
 from .hashing import canonical_json_bytes, sha256_prefixed
+from .models import AuditIntegrity, AuditRecord
+
+
+# (second, "YYYY-MM-DDTHH:MM:SS") for the last second formatted; swapped as one tuple
+_ISO_SECOND: Tuple[int, str] = (-1, "")
 
 
 def utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    """
+    UTC timestamp with microseconds, e.g. "2026-01-06T19:00:00.123456Z".
+    The date/time part is formatted once per second and reused.
+    """
+    global _ISO_SECOND
+    sec, ns = divmod(time.time_ns(), 1_000_000_000)
+    cached_sec, prefix = _ISO_SECOND
+    if sec != cached_sec:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        _ISO_SECOND = (sec, prefix)
+    return "%s.%06dZ" % (prefix, ns // 1000)
 
 
 @dataclass(frozen=True)
@@ -21,11 +41,15 @@ class AuditAppendResult:
     record_hash: str
 
 
-def _audit_path() -> str:
+def _audit_path_template() -> str:
+    return os.getenv("AUDIT_LOG_PATH", "audit.log")
+
+
+def _expand_audit_path(raw: str) -> str:
     """
-    Resolve AUDIT_LOG_PATH, expanding {pid} if present.
+    Expand {pid} if present. Done at write time, so a template resolved
+    before workers fork still gives each process its own file.
     """
-    raw = os.getenv("AUDIT_LOG_PATH", "audit.log")
     if "{pid}" in raw:
         raw = raw.replace("{pid}", str(os.getpid()))
     return raw
@@ -45,24 +69,59 @@ def _tail_last_record(path: str) -> Optional[Dict[str, Any]]:
             if f.tell() == 0:
                 return None
 
-            pos = f.tell() - 1
+            # Start before the last record's own trailing newline
+            pos = f.tell() - 2
             while pos > 0:
                 f.seek(pos)
                 if f.read(1) == b"\n":
                     break
                 pos -= 1
 
-            if pos == 0:
+            if pos <= 0:
                 f.seek(0)
 
-            line = f.readline().decode("utf-8").strip()
+            line = f.readline().strip()
             if not line:
                 return None
-            return json.loads(line)
+            return msgspec.json.decode(line)
     except Exception:
         return None
 
 
+def _chain_records(
+    records: List[AuditRecord], seq: int, prev_hash: str
+) -> Tuple[List[bytes], List[AuditAppendResult]]:
+    """
+    Assign seq, logged_at + integrity to each record, continuing the chain
+    from (seq, prev_hash). Returns the NDJSON lines and their append results.
+    """
+    lines: List[bytes] = []
+    results: List[AuditAppendResult] = []
+    # The batch is written together, so it shares one logged_at
+    logged_at = utc_now_iso()
+
+    for record in records:
+        # record_hash covers the record with an empty record_hash
+        record = msgspec.structs.replace(
+            record,
+            seq=seq,
+            timestamps=msgspec.structs.replace(record.timestamps, logged_at=logged_at),
+            integrity=AuditIntegrity(prev_hash=prev_hash, record_hash=""),
+        )
+        record_hash = sha256_prefixed(canonical_json_bytes(record))
+        record = msgspec.structs.replace(
+            record, integrity=AuditIntegrity(prev_hash=prev_hash, record_hash=record_hash)
+        )
+
+        lines.append(canonical_json_bytes(record) + b"\n")
+        results.append(AuditAppendResult(seq=seq, prev_hash=prev_hash, record_hash=record_hash))
+
+        seq += 1
+        prev_hash = record_hash
+
+    return lines, results
+
+
 class AuditWriter:
     """
     Single-process audit writer.
@@ -87,31 +146,30 @@ class AuditWriter:
 
         self._fh = open(path, "ab", buffering=0)
 
-    def append(self, record: Dict[str, Any]) -> AuditAppendResult:
-        with self._lock:
-            seq = self._seq
-            prev_hash = self._last_hash
-
-            record = dict(record)
-            record["seq"] = seq
-            record["integrity"] = {"prev_hash": prev_hash, "record_hash": ""}
+    def append(self, record: AuditRecord) -> AuditAppendResult:
+        return self.append_many([record])[0]
 
-            record_for_hash = dict(record)
-            integrity = dict(record_for_hash["integrity"])
-            integrity["record_hash"] = ""
-            record_for_hash["integrity"] = integrity
-
-            record_hash = sha256_prefixed(canonical_json_bytes(record_for_hash))
-            record["integrity"]["record_hash"] = record_hash
+    def append_many(self, records: List[AuditRecord]) -> List[AuditAppendResult]:
+        """
+        Chain and append a batch of records with a single write.
+        Writer state only advances once the write succeeded.
+        """
+        if not records:
+            return []
+        with self._lock:
+            lines, results = _chain_records(records, self._seq, self._last_hash)
 
-            line = canonical_json_bytes(record) + b"\n"
-            self._fh.write(line)
+            # Unbuffered writes may be short; the chain only advances once
+            # every byte of the batch is on its way to disk
+            data = memoryview(b"".join(lines))
+            while data:
+                data = data[self._fh.write(data):]
             self._fh.flush()
 
-            self._seq += 1
-            self._last_hash = record_hash
+            self._seq = results[-1].seq + 1
+            self._last_hash = results[-1].record_hash
 
-            return AuditAppendResult(seq=seq, prev_hash=prev_hash, record_hash=record_hash)
+            return results
 
 
 # One writer per resolved path
@@ -128,7 +186,149 @@ def _get_writer(path: str) -> AuditWriter:
         return w
 
 
-def append_audit_record(record: Dict[str, Any]) -> AuditAppendResult:
-    path = _audit_path()
-    writer = _get_writer(path)
-    return writer.append(record)
+_PendingRecord = Tuple[str, AuditRecord, asyncio.AbstractEventLoop, "asyncio.Future[AuditAppendResult]"]
+
+
+def _resolve(fut: "asyncio.Future[AuditAppendResult]", result: Any, exc: Optional[BaseException]) -> None:
+    if fut.done():
+        return
+    if exc is not None:
+        fut.set_exception(exc)
+    else:
+        fut.set_result(result)
+
+
+class AuditBatcher:
+    """
+    Group commit for audit appends.
+
+    Handlers enqueue a record and wait for it to be written; one writer thread
+    drains whatever is queued (up to max_batch) and appends it with a single
+    write per audit file. Records arriving during a write form the next batch,
+    so batches grow with load without delaying an idle gate.
+
+    A decision is still never returned before its audit record is written.
+    """
+    def __init__(self, max_batch: int = 256, maxsize: int = 10_000):
+        self._max_batch = max_batch
+        self._q: "queue.Queue[_PendingRecord]" = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                t = threading.Thread(target=self._run, name="ecl-audit-writer", daemon=True)
+                t.start()
+                self._thread = t
+
+    async def submit(self, record: AuditRecord, path: str) -> AuditAppendResult:
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        fut: "asyncio.Future[AuditAppendResult]" = loop.create_future()
+        item: _PendingRecord = (path, record, loop, fut)
+        try:
+            self._q.put_nowait(item)
+        except queue.Full:
+            # Backpressure: wait for room without blocking the event loop
+            await anyio.to_thread.run_sync(self._q.put, item)
+        return await fut
+
+    async def drain(self) -> None:
+        """
+        Wait until everything queued so far has been written (on shutdown).
+        """
+        if self._thread is None:
+            return
+        await anyio.to_thread.run_sync(self._q.join)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._q.get()]
+            while len(batch) < self._max_batch:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+
+    def _commit(self, batch: List[_PendingRecord]) -> None:
+        by_path: Dict[str, List[_PendingRecord]] = {}
+        for item in batch:
+            by_path.setdefault(item[0], []).append(item)
+
+        for path, items in by_path.items():
+            try:
+                results: List[Any] = _get_writer(path).append_many([item[1] for item in items])
+                exc: Optional[BaseException] = None
+            except Exception as e:
+                results = [None] * len(items)
+                exc = e
+
+            for (_, _, loop, fut), result in zip(items, results):
+                try:
+                    loop.call_soon_threadsafe(_resolve, fut, result, exc)
+                except RuntimeError:
+                    # Waiter's loop already closed; nobody left to notify
+                    pass
+
+
+_BATCHER = AuditBatcher()
+
+
+class AuditSink(Protocol):
+    async def submit(self, record: AuditRecord) -> AuditAppendResult: ...
+
+    async def aclose(self) -> None: ...
+
+
+class FileAuditSink:
+    """
+    Default sink: hash-chained NDJSON appended to a file through the
+    group-commit writer thread. path defaults to AUDIT_LOG_PATH, read once
+    here; {pid} is still expanded per write.
+    """
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path if path is not None else _audit_path_template()
+
+    async def submit(self, record: AuditRecord) -> AuditAppendResult:
+        return await _BATCHER.submit(record, _expand_audit_path(self.path))
+
+    async def aclose(self) -> None:
+        # Handlers already wait for their own record; this only covers
+        # records whose handler was cancelled mid-wait
+        await _BATCHER.drain()
+
+
+class InMemoryAuditSink:
+    """
+    Keeps the hash-chained audit lines in memory instead of on disk.
+    Lines are byte-identical to what the file sink would write.
+    """
+    def __init__(self, maxlen: Optional[int] = None) -> None:
+        # maxlen bounds memory for long runs; the chain itself stays intact
+        self.lines: Deque[bytes] = deque(maxlen=maxlen)
+        self._seq = 0
+        self._last_hash = "sha256:GENESIS"
+        self._lock = threading.Lock()
+
+    async def submit(self, record: AuditRecord) -> AuditAppendResult:
+        with self._lock:
+            lines, results = _chain_records([record], self._seq, self._last_hash)
+            self.lines.extend(lines)
+            self._seq = results[-1].seq + 1
+            self._last_hash = results[-1].record_hash
+        return results[0]
+
+    async def aclose(self) -> None:
+        pass
+
+    def records(self) -> List[Dict[str, Any]]:
+        return [msgspec.json.decode(line) for line in self.lines]
+
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
@@ -21,7 +22,15 @@ class RuntimeIdentity:
     build: str = "local-dev"
 
 
+@functools.lru_cache(maxsize=None)
+def runtime_meta(runtime: RuntimeIdentity) -> RuntimeMeta:
+    # RuntimeIdentity is frozen, so every decision can share one RuntimeMeta
+    return RuntimeMeta(name=runtime.name, version=runtime.version, build=runtime.build)
+
+
+@functools.lru_cache(maxsize=4096)
 def provenance_id_from_inputs(request_hash: str, profile_ref_hash: str, runtime_version: str) -> str:
+    # Pure function of its inputs; repeated requests (retries, replays) skip the hash
     payload = {
         "request_hash": request_hash,
         "profile_ref_hash": profile_ref_hash,
@@ -54,7 +63,7 @@ def deny_decision(
             version=profile_version,
             profile_ref_hash=profile_ref_hash,
         ),
-        runtime=RuntimeMeta(name=runtime.name, version=runtime.version, build=runtime.build),
+        runtime=runtime_meta(runtime),
         approved_call=None,
     )
 
@@ -79,7 +88,7 @@ def allow_decision(
             version=profile_version,
             profile_ref_hash=profile_ref_hash,
         ),
-        runtime=RuntimeMeta(name=runtime.name, version=runtime.version, build=runtime.build),
+        runtime=runtime_meta(runtime),
         approved_call=ApprovedCall(tool_name=tool_name, tool_args=tool_args),
     )
 
@@ -1,16 +1,13 @@
 from __future__ import annotations
 
-import re
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from .models import ExecutionProfile, ExecutionRequest, ReasonCode, ToolPermit
 
 
 def find_tool_permit(profile: ExecutionProfile, tool_name: str) -> Optional[ToolPermit]:
-    for p in profile.allowed_tools:
-        if p.name == tool_name:
-            return p
-    return None
+    # Index built once by profiles.load_profile
+    return profile._tools_by_name.get(tool_name)
 
 
 def require_controls(req: ExecutionRequest, permit: ToolPermit) -> Optional[ReasonCode]:
@@ -24,60 +21,88 @@ def require_controls(req: ExecutionRequest, permit: ToolPermit) -> Optional[Reas
     return None
 
 
-def _get_arg_value(args: Any, path: str) -> Any:
+def arg_key(path: str) -> Optional[str]:
     """
     Minimal path support for demo rules:
       - "$.key" for dict lookup
-    Anything else -> error (fail closed).
+    Anything else -> None (the generated checker fails closed).
     """
     if not path.startswith("$."):
-        raise ValueError("unsupported path")
-    key = path[2:]
-    if not isinstance(args, dict):
-        raise ValueError("args not object")
-    return args.get(key, None)
+        return None
+    return path[2:]
 
 
-def enforce_constraints(req: ExecutionRequest, permit: ToolPermit) -> Optional[ReasonCode]:
-    if not permit.constraints or not permit.constraints.arg_rules:
-        return None
+def build_constraint_checker(permit: ToolPermit) -> Callable[[Any], Optional[ReasonCode]]:
+    """
+    Specialize the permit's arg rules into straight-line Python, once per profile load.
 
-    args = req.tool.args
+    The generated function returns exactly what the rule-by-rule evaluation
+    would: CONSTRAINT_VIOLATION, CONSTRAINT_EVAL_ERROR, or None. All rule
+    values are bound as names in the function's namespace, never spliced
+    into the source.
+    """
+    rules = permit.constraints.arg_rules if permit.constraints else []
+    ns: Dict[str, Any] = {
+        "CV": ReasonCode.CONSTRAINT_VIOLATION,
+        "EVAL": ReasonCode.CONSTRAINT_EVAL_ERROR,
+    }
+    src: List[str] = ["def check(args):"]
+
+    if rules:
+        # Non-object args cannot satisfy any "$.key" lookup
+        src.append("    if not isinstance(args, dict): return EVAL")
+
+    for i, rule in enumerate(rules):
+        key = rule._key
+        if key is None:
+            src.append("    return EVAL")
+            break
+
+        ns[f"_K{i}"] = key
+        src.append(f"    v = args.get(_K{i})")
+        # Missing value fails closed for constrained fields
+        src.append("    if v is None: return CV")
+
+        if rule.type == "string":
+            src.append("    if not isinstance(v, str): return CV")
+            if rule.max_len is not None:
+                ns[f"_LEN{i}"] = rule.max_len
+                src.append(f"    if len(v) > _LEN{i}: return CV")
+            if rule.enum is not None:
+                ns[f"_ENUM{i}"] = frozenset(rule.enum)
+                src.append(f"    if v not in _ENUM{i}: return CV")
+            if rule.pattern is not None:
+                ns[f"_PAT{i}"] = rule._compiled
+                # Whole value must match (re.match would accept "a@example.com\n" for "...$")
+                src.append(f"    if _PAT{i}.fullmatch(v) is None: return CV")
+
+        elif rule.type == "number":
+            src.append("    if not isinstance(v, (int, float)): return CV")
+            if rule.min is not None:
+                ns[f"_MIN{i}"] = rule.min
+                src.append(f"    if float(v) < _MIN{i}: return CV")
+            if rule.max is not None:
+                ns[f"_MAX{i}"] = rule.max
+                src.append(f"    if float(v) > _MAX{i}: return CV")
+
+        elif rule.type == "bool":
+            src.append("    if not isinstance(v, bool): return CV")
+
+        else:
+            # Unknown rule type -> fail closed
+            src.append("    return EVAL")
+            break
+    else:
+        src.append("    return None")
+
+    code = compile("\n".join(src), f"<permit:{permit.name}>", "exec")
+    exec(code, ns)
+    return ns["check"]
 
-    try:
-        for rule in permit.constraints.arg_rules:
-            v = _get_arg_value(args, rule.path)
-
-            # Missing value fails closed for constrained fields
-            if v is None:
-                return ReasonCode.CONSTRAINT_VIOLATION
-
-            if rule.type == "string":
-                if not isinstance(v, str):
-                    return ReasonCode.CONSTRAINT_VIOLATION
-                if rule.max_len is not None and len(v) > rule.max_len:
-                    return ReasonCode.CONSTRAINT_VIOLATION
-                if rule.enum is not None and v not in rule.enum:
-                    return ReasonCode.CONSTRAINT_VIOLATION
-                if rule.pattern is not None and re.match(rule.pattern, v) is None:
-                    return ReasonCode.CONSTRAINT_VIOLATION
-
-            elif rule.type == "number":
-                if not isinstance(v, (int, float)):
-                    return ReasonCode.CONSTRAINT_VIOLATION
-                if rule.min is not None and float(v) < rule.min:
-                    return ReasonCode.CONSTRAINT_VIOLATION
-                if rule.max is not None and float(v) > rule.max:
-                    return ReasonCode.CONSTRAINT_VIOLATION
-
-            elif rule.type == "bool":
-                if not isinstance(v, bool):
-                    return ReasonCode.CONSTRAINT_VIOLATION
-
-            else:
-                # Unknown rule type -> fail closed
-                return ReasonCode.CONSTRAINT_EVAL_ERROR
 
-        return None
+def enforce_constraints(req: ExecutionRequest, permit: ToolPermit) -> Optional[ReasonCode]:
+    try:
+        # Generated by build_constraint_checker at profile load
+        return permit._checker(req.tool.args)
     except Exception:
         return ReasonCode.CONSTRAINT_EVAL_ERROR
@@ -1,141 +1,135 @@
 from __future__ import annotations
-import anyio
 
-import json
-from typing import Any, Dict
+import contextlib
+import msgspec
+from typing import Any, AsyncIterator, Optional
 from .enforce import find_tool_permit, require_controls, enforce_constraints
 from .decision import allow_decision
 
-from fastapi import FastAPI, Request
-from pydantic import ValidationError
+from fastapi import Depends, FastAPI, Request, Response
 from .profiles import load_profile
 from .decision import provenance_id_from_inputs
 
-from .audit import append_audit_record, utc_now_iso
+from .audit import AuditSink, utc_now_iso
 from .decision import RuntimeIdentity, deny_decision, fallback_profile_ref_hash
-from .hashing import sha256_prefixed, hash_json, canonical_json_bytes
-from .models import ExecutionRequest, ReasonCode, DecisionType
+from .hashing import blake3_prefixed, sha256_prefixed, canonical_json_bytes
+from .models import AuditRecord, AuditTimestamps, ExecutionDecision, ExecutionRequest, ReasonCode
+from .settings import Settings, get_audit_sink
 
 
-def create_app() -> FastAPI:
-    app = FastAPI(title="ECL Reference Runtime", version="0.1.0")
+# Fused JSON parse + strict schema validation (single C pass over the raw body)
+_REQ_DEC = msgspec.json.Decoder(ExecutionRequest)
+
+# Marks a body that is not well-formed JSON
+_MALFORMED = object()
+
+_RESP_ENC = msgspec.json.Encoder()
+
+
+class MsgspecResponse(Response):
+    """Encodes the decision Struct directly (no model_dump / stdlib json pass)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return _RESP_ENC.encode(content)
+
+
+# Accepted context.snapshot_hash algorithms, by prefix. Request, profile and
+# audit hashes stay SHA-256; this only lets clients with large snapshots opt
+# into BLAKE3. An unknown prefix is checked as SHA-256, so it cannot match.
+# blake3 is a pinned dependency, so every host accepts the same prefixes.
+_SNAPSHOT_HASHERS = {"sha256": sha256_prefixed, "blake3": blake3_prefixed}
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Build the gate. Configuration comes from settings, or from the
+    environment (read once, here) when none is given.
+    """
+    if settings is None:
+        settings = Settings.from_env()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        yield
+        # Flush any audit records still queued before the process exits
+        await settings.audit_sink.aclose()
+
+    app = FastAPI(title="ECL Reference Runtime", version="0.1.0", lifespan=lifespan)
+    app.state.settings = settings
 
     runtime = RuntimeIdentity()
+    profiles_root = settings.profiles_root
+
+    # Constant for the app's lifetime; computed once instead of per request
+    no_profile_ref_hash = fallback_profile_ref_hash()
 
     @app.post("/v1/execute")
-    async def execute(request: Request) -> Dict[str, Any]:
+    async def execute(request: Request, audit_sink: AuditSink = Depends(get_audit_sink)) -> Response:
         received_at = utc_now_iso()
         raw = await request.body()
 
         # Defaults for cases where parsing fails
         profile_id = "UNKNOWN"
         profile_version = "UNKNOWN"
-        profile_ref_hash = fallback_profile_ref_hash()
+        profile_ref_hash = no_profile_ref_hash
         request_id = "UNKNOWN"
 
         try:
-            # We parse JSON ourselves to ensure malformed JSON becomes a deterministic DENY
+            # We parse JSON ourselves to ensure malformed JSON becomes a deterministic DENY.
+            # Parsing and schema validation (strict) happen in one decode.
+            obj = None
             try:
-                obj = json.loads(raw.decode("utf-8"))
-            except Exception:
-                req_hash = sha256_prefixed(raw)
-                decision = deny_decision(
-                    reason=ReasonCode.REQUEST_PARSE_ERROR,
-                    request_hash=req_hash,
-                    profile_id=profile_id,
-                    profile_version=profile_version,
-                    profile_ref_hash=profile_ref_hash,
-                    runtime=runtime,
+                req = _REQ_DEC.decode(raw)
+            except msgspec.ValidationError:
+                req = None
+                # Validation can stop before the end of the body, so re-check
+                # well-formedness before treating this as a schema error.
+                try:
+                    obj = msgspec.json.decode(raw)
+                except (msgspec.DecodeError, UnicodeDecodeError):
+                    obj = _MALFORMED
+            except (msgspec.DecodeError, UnicodeDecodeError):
+                req = None
+                obj = _MALFORMED
+
+            if obj is _MALFORMED:
+                return await _deny_and_audit(
+                    ReasonCode.REQUEST_PARSE_ERROR, sha256_prefixed(raw),
+                    profile_id, profile_version, profile_ref_hash,
+                    request_id, received_at, runtime, audit_sink,
                 )
 
-                decided_at = utc_now_iso()
-                record = _audit_record_from_denied(
-                    request_id=request_id,
-                    request_hash=req_hash,
-                    profile_id=profile_id,
-                    profile_version=profile_version,
-                    profile_ref_hash=profile_ref_hash,
-                    decision_type=decision.decision_type,
-                    reason_code=decision.reason_code.value,
-                    runtime=decision.runtime.model_dump(),
-                    received_at=received_at,
-                    decided_at=decided_at,
+            if req is None:
+                return await _deny_and_audit(
+                    ReasonCode.REQUEST_SCHEMA_INVALID, sha256_prefixed(canonical_json_bytes(obj)),
+                    profile_id, profile_version, profile_ref_hash,
+                    request_id, received_at, runtime, audit_sink,
                 )
 
-                # MUST attempt audit write; failure modes handled later (fail-closed)
-                await anyio.to_thread.run_sync(append_audit_record, record)
-
-                return decision.model_dump()
-
-            # Schema validation (strict)
-            try:
-                req = ExecutionRequest.model_validate(obj)
-            except ValidationError:
-                req_hash = sha256_prefixed(canonical_json_bytes(obj))
-                decision = deny_decision(
-                    reason=ReasonCode.REQUEST_SCHEMA_INVALID,
-                    request_hash=req_hash,
-                    profile_id=profile_id,
-                    profile_version=profile_version,
-                    profile_ref_hash=profile_ref_hash,
-                    runtime=runtime,
-                )
-
-                decided_at = utc_now_iso()
-                record = _audit_record_from_denied(
-                    request_id=request_id,
-                    request_hash=req_hash,
-                    profile_id=profile_id,
-                    profile_version=profile_version,
-                    profile_ref_hash=profile_ref_hash,
-                    decision_type=decision.decision_type,
-                    reason_code=decision.reason_code.value,
-                    runtime=decision.runtime.model_dump(),
-                    received_at=received_at,
-                    decided_at=decided_at,
-                )
-                await anyio.to_thread.run_sync(append_audit_record, record)
-                return decision.model_dump()
-
             # From here on, we have a valid request shape
             request_id = req.request_id
             profile_id = req.profile.id
             profile_version = req.profile.version
 
             # Deterministic hashes
-            req_hash = hash_json(req.model_dump())
+            req_hash = sha256_prefixed(canonical_json_bytes(req))
 
             # Context snapshot integrity check (fail closed)
-            computed_ctx = hash_json(req.context.snapshot)
-            if req.context.snapshot_hash != computed_ctx:
-                decision = deny_decision(
-                    reason=ReasonCode.CTX_HASH_MISMATCH,
-                    request_hash=req_hash,
-                    profile_id=profile_id,
-                    profile_version=profile_version,
-                    profile_ref_hash=profile_ref_hash,
-                    runtime=runtime,
-                )
-                decided_at = utc_now_iso()
-                record = _audit_record_from_denied(
-                    request_id=request_id,
-                    request_hash=req_hash,
-                    profile_id=profile_id,
-                    profile_version=profile_version,
-                    profile_ref_hash=profile_ref_hash,
-                    decision_type=decision.decision_type,
-                    reason_code=decision.reason_code.value,
-                    runtime=decision.runtime.model_dump(),
-                    received_at=received_at,
-                    decided_at=decided_at,
+            claimed_ctx = req.context.snapshot_hash
+            hasher = _SNAPSHOT_HASHERS.get(claimed_ctx.partition(":")[0], sha256_prefixed)
+            computed_ctx = hasher(canonical_json_bytes(req.context.snapshot))
+            if claimed_ctx != computed_ctx:
+                return await _deny_and_audit(
+                    ReasonCode.CTX_HASH_MISMATCH, req_hash,
+                    profile_id, profile_version, profile_ref_hash,
+                    request_id, received_at, runtime, audit_sink,
                 )
-                await anyio.to_thread.run_sync(append_audit_record, record)
-                return decision.model_dump()
 
-                        # Load profile (fail closed)
-                        
+            # Load profile (fail closed)
             try:
-                profile_model, profile_ref_hash = load_profile(profile_id, profile_version)
+                profile_model, profile_ref_hash = load_profile(profile_id, profile_version, profiles_root)
             except RuntimeError as e:
                 reason_str = str(e.args[0]) if e.args else ReasonCode.PROFILE_PARSE_ERROR.value
                 reason = (
@@ -143,186 +137,112 @@ def create_app() -> FastAPI:
                     if reason_str in ReasonCode._value2member_map_
                     else ReasonCode.PROFILE_PARSE_ERROR
                 )
-
-                decision = deny_decision(
-                    reason=reason,
-                    request_hash=req_hash,
-                    profile_id=profile_id,
-                    profile_version=profile_version,
-                    profile_ref_hash=profile_ref_hash,
-                    runtime=runtime,
-                )
-
-                decided_at = utc_now_iso()
-                record = _audit_record_from_denied(
-                    request_id=request_id,
-                    request_hash=req_hash,
-                    profile_id=profile_id,
-                    profile_version=profile_version,
-                    profile_ref_hash=profile_ref_hash,
-                    decision_type=decision.decision_type,
-                    reason_code=decision.reason_code.value,
-                    runtime=decision.runtime.model_dump(),
-                    received_at=received_at,
-                    decided_at=decided_at,
+                return await _deny_and_audit(
+                    reason, req_hash,
+                    profile_id, profile_version, profile_ref_hash,
+                    request_id, received_at, runtime, audit_sink,
                 )
-                await anyio.to_thread.run_sync(append_audit_record, record)
-                return decision.model_dump()
 
             # Enforce allowlist + controls + constraints
             permit = find_tool_permit(profile_model, req.tool.name)
             if permit is None:
-                decision = deny_decision(
-                    reason=ReasonCode.TOOL_NOT_ALLOWED,
-                    request_hash=req_hash,
-                    profile_id=profile_id,
-                    profile_version=profile_version,
-                    profile_ref_hash=profile_ref_hash,
-                    runtime=runtime,
-                )
+                rc = ReasonCode.TOOL_NOT_ALLOWED
             else:
-                rc = require_controls(req, permit)
-                if rc is not None:
-                    decision = deny_decision(
-                        reason=rc,
-                        request_hash=req_hash,
-                        profile_id=profile_id,
-                        profile_version=profile_version,
-                        profile_ref_hash=profile_ref_hash,
-                        runtime=runtime,
-                    )
-                else:
-                    rc2 = enforce_constraints(req, permit)
-                    if rc2 is not None:
-                        decision = deny_decision(
-                            reason=rc2,
-                            request_hash=req_hash,
-                            profile_id=profile_id,
-                            profile_version=profile_version,
-                            profile_ref_hash=profile_ref_hash,
-                            runtime=runtime,
-                        )
-                    else:
-                        decision = allow_decision(
-                            request_hash=req_hash,
-                            profile_id=profile_id,
-                            profile_version=profile_version,
-                            profile_ref_hash=profile_ref_hash,
-                            tool_name=req.tool.name,
-                            tool_args=req.tool.args,
-                            runtime=runtime,
-                        )
-
-            decided_at = utc_now_iso()
-            record = _audit_record_from_denied(
-                request_id=request_id,
-                request_hash=req_hash,
-                profile_id=profile_id,
-                profile_version=profile_version,
-                profile_ref_hash=profile_ref_hash,
-                decision_type=decision.decision_type,
-                reason_code=decision.reason_code.value,
-                runtime=decision.runtime.model_dump(),
-                received_at=received_at,
-                decided_at=decided_at,
-            )
-            await anyio.to_thread.run_sync(append_audit_record, record)
-            return decision.model_dump()
-
+                rc = require_controls(req, permit) or enforce_constraints(req, permit)
 
+            if rc is not None:
+                return await _deny_and_audit(
+                    rc, req_hash,
+                    profile_id, profile_version, profile_ref_hash,
+                    request_id, received_at, runtime, audit_sink,
+                )
 
-        except Exception:
-            # Hard fail-closed fallback (still logs)
-            req_hash = sha256_prefixed(raw)
-            decision = deny_decision(
-                reason=ReasonCode.INTERNAL_ERROR,
+            decision = allow_decision(
                 request_hash=req_hash,
                 profile_id=profile_id,
                 profile_version=profile_version,
                 profile_ref_hash=profile_ref_hash,
+                tool_name=req.tool.name,
+                tool_args=req.tool.args,
                 runtime=runtime,
             )
-            decided_at = utc_now_iso()
-            record = _audit_record_from_denied(
-                request_id=request_id,
-                request_hash=req_hash,
-                profile_id=profile_id,
-                profile_version=profile_version,
-                profile_ref_hash=profile_ref_hash,
-                decision_type=decision.decision_type,
-                reason_code=decision.reason_code.value,
-                runtime=decision.runtime.model_dump(),
-                received_at=received_at,
-                decided_at=decided_at,
+            return await _audit_decision(decision, request_id, received_at, audit_sink)
+
+        except Exception:
+            # Hard fail-closed fallback (still logs)
+            return await _deny_and_audit(
+                ReasonCode.INTERNAL_ERROR, sha256_prefixed(raw),
+                profile_id, profile_version, profile_ref_hash,
+                request_id, received_at, runtime, audit_sink,
             )
-            await anyio.to_thread.run_sync(append_audit_record, record)
-            return decision.model_dump()
 
     return app
 
 
-def _audit_record_from_denied(
-    request_id: str,
+async def _deny_and_audit(
+    reason: ReasonCode,
     request_hash: str,
     profile_id: str,
     profile_version: str,
     profile_ref_hash: str,
-    runtime: Dict[str, Any],
+    request_id: str,
     received_at: str,
-    decided_at: str,
-    decision_type: str = None,
-    reason_code: str = None,
-    approved_call: Dict[str, Any] = None,
-    decision: Dict[str, Any] = None,
-    **_: Any,
-) -> Dict[str, Any]:
-    logged_at = utc_now_iso()
-
-    runtime_version = (
-        runtime.get("runtime_version")
-        or runtime.get("version")
-        or runtime.get("app_version")
-        or runtime.get("runtime")
-        or "0"
-    )
-
-    prov_id = provenance_id_from_inputs(
+    runtime: RuntimeIdentity,
+    audit_sink: AuditSink,
+) -> Response:
+    decision = deny_decision(
+        reason=reason,
         request_hash=request_hash,
+        profile_id=profile_id,
+        profile_version=profile_version,
         profile_ref_hash=profile_ref_hash,
-        runtime_version=runtime_version,
+        runtime=runtime,
     )
+    return await _audit_decision(decision, request_id, received_at, audit_sink)
+
+
+async def _audit_decision(
+    decision: ExecutionDecision,
+    request_id: str,
+    received_at: str,
+    audit_sink: AuditSink,
+) -> Response:
+    # The record is built right after the decision: one clock read covers both
+    decided_at = utc_now_iso()
+    record = _audit_record_from_decision(decision, request_id, received_at, decided_at)
 
-    # Normalize decision fields (fail-closed defaults)
-    if decision is not None:
-        d = dict(decision)
-        dt = d.get("decision_type") or decision_type or "DENY"
-        rc = d.get("reason_code") or reason_code or "INTERNAL_ERROR"
-        ac = d.get("approved_call", approved_call)
-    else:
-        dt = decision_type or "DENY"
-        rc = reason_code or "INTERNAL_ERROR"
-        ac = approved_call
-
-    record = {
-        "provenance_id": prov_id,
-        "seq": 0,  # overwritten by audit append
-        "request_id": request_id,
-        "request_hash": request_hash,
-
-        # ✅ keep legacy/top-level shape (tests expect this)
-        "decision_type": dt,
-        "reason_code": rc,
-        "approved_call": ac,
-
-        "profile_id": profile_id,
-        "profile_version": profile_version,
-        "profile_ref_hash": profile_ref_hash,
-        "runtime": runtime,
-        "timestamps": {
-            "received_at": received_at,
-            "decided_at": decided_at,
-            "logged_at": logged_at,
-        },
-    }
-
-    return record
+    # MUST attempt audit write; failure modes handled later (fail-closed)
+    await audit_sink.submit(record)
+
+    return MsgspecResponse(decision)
+
+
+def _audit_record_from_decision(
+    decision: ExecutionDecision,
+    request_id: str,
+    received_at: str,
+    decided_at: str,
+) -> AuditRecord:
+    # Every field comes from the gate itself, so the record is built directly
+    # without a validation pass.
+    profile = decision.profile
+    return AuditRecord(
+        provenance_id=provenance_id_from_inputs(
+            request_hash=decision.request_hash,
+            profile_ref_hash=profile.profile_ref_hash,
+            runtime_version=decision.runtime.version,
+        ),
+        request_id=request_id,
+        request_hash=decision.request_hash,
+        decision_type=decision.decision_type,
+        reason_code=decision.reason_code,
+        profile_id=profile.id,
+        profile_version=profile.version,
+        profile_ref_hash=profile.profile_ref_hash,
+        runtime=decision.runtime,
+        timestamps=AuditTimestamps(
+            received_at=received_at,
+            decided_at=decided_at,
+            logged_at="",  # stamped by the audit sink when the record is written
+        ),
+    )
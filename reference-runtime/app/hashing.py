@@ -2,27 +2,149 @@ from __future__ import annotations
 
 import hashlib
 import json
+import math
+import re
 from typing import Any
 
+from blake3 import blake3 as _blake3  # BLAKE3 snapshot hashes (pinned in requirements.txt)
 
-def canonical_json_bytes(obj: Any) -> bytes:
+try:
+    import msgspec
+
+    HAVE_MSGSPEC = True
+except ImportError:  # e.g. standalone client scripts
+    msgspec = None
+    HAVE_MSGSPEC = False
+
+
+def _canonical_json_bytes_ref(obj: Any) -> bytes:
+    """
+    Reference canonicalization (json.dumps); defines the canonical bytes.
+    """
+    if HAVE_MSGSPEC:
+        # Structs / enums -> plain JSON types
+        obj = msgspec.to_builtins(obj)
+    s = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return s.encode("utf-8")
+
+
+# Canonical floats are Python's repr (shortest round-trip digits, correctly
+# rounded, identical on every platform). msgspec (like orjson) picks the
+# same digits but renders some of them differently:
+#   - exponent form: 1e16 vs 1e+16, 1e-7 vs 1e-07
+#   - magnitudes in [1e-6, 1e-4): 0.00001 vs 1e-05
+# Both are detected on the output (anchored on literals so the scan stays
+# cheap); a string that merely looks like one only costs a trip through
+# the reference path.
+_EXP_NUMBER = re.compile(rb"e-?\d+(?:[,\]}]|$)")
+
+
+def _has_non_finite(obj: Any) -> bool:
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, float):
+            if not math.isfinite(o):
+                return True
+        elif isinstance(o, dict):
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple)):
+            stack.extend(o)
+        elif isinstance(o, msgspec.Struct):
+            stack.extend(msgspec.structs.astuple(o))
+    return False
+
+
+def _canonical_json_bytes_msgspec(obj: Any, check_non_finite: bool = False) -> bytes:
+    try:
+        out = _SORTED_ENC.encode(obj)
+    except TypeError:
+        # Non-str dict keys: json.dumps stringifies them, msgspec refuses
+        return _canonical_json_bytes_ref(obj)
+    if b"0.0000" in out or _EXP_NUMBER.search(out) is not None:
+        return _canonical_json_bytes_ref(obj)
+    # msgspec writes NaN / +-Infinity as null, json.dumps as NaN / Infinity.
+    # Only a null in the output can hide one, so only then walk the input.
+    if check_non_finite and b"null" in out and _has_non_finite(obj):
+        return _canonical_json_bytes_ref(obj)
+    return out
+
+
+# One-time self-test: the fast path is only used if it reproduces the
+# reference bytes exactly.
+_SELF_TEST_CASES = (
+    {"x": 1},
+    {"b": [1, 2, {"z": None, "a": True}], "a": "é \x7f\x00\n\t\"\\/"},
+    {"10": 1, "9": 2, "Z": 3, "é": 4, "\U0001f600": 5, "": 6},
+    [0, -1, 2**63, -(2**70), [], {}],
+    {"x": 1.0},
+    {"f": [1.0, 0.1, -0.0, 123456789.123, 1e16, 1.5e-5, 1.5e-7]},
+    {"n": [[0.5, [2.5e-3, {"y": -1e-4}]], [1e15, 9007199254740993.0]]},
+    [5e-324, 2.2250738585072014e-308, 1.7976931348623157e308, 1e22, -1e-05],
+    {"x": float("nan"), "y": [float("inf"), -float("inf"), None]},
+    {1: "a", 10: "b", 2: "c"},
+)
+
+
+def _fast_path_ok() -> bool:
+    try:
+        return all(
+            _canonical_json_bytes_msgspec(case, True) == _canonical_json_bytes_ref(case)
+            for case in _SELF_TEST_CASES
+        )
+    except Exception:
+        return False
+
+
+if HAVE_MSGSPEC:
+    _SORTED_ENC = msgspec.json.Encoder(order="sorted")
+    _FAST = _fast_path_ok()
+else:
+    _FAST = False
+
+
+def canonical_json_bytes(obj: Any, check_non_finite: bool = False) -> bytes:
     """
     Deterministic JSON canonicalization (minimal).
     - sort keys
     - no whitespace
     - UTF-8
+    Emitted by msgspec's C encoder when available (byte-identical to json.dumps).
+    Set check_non_finite when obj may hold NaN / +-Infinity (caller-supplied
+    data, as in hash_json). The gate leaves it unset: its decoder rejects
+    non-finite numbers, and it builds the rest of what it hashes itself.
     """
-    s = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
-    return s.encode("utf-8")
+    if _FAST:
+        return _canonical_json_bytes_msgspec(obj, check_non_finite)
+    return _canonical_json_bytes_ref(obj)
 
 
 def sha256_hex(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
+_SHA256_PREFIX = "sha256:"
+
+
 def sha256_prefixed(data: bytes) -> str:
-    return f"sha256:{sha256_hex(data)}"
+    # Hot path (request, context and provenance hashes): one call, one concat
+    return _SHA256_PREFIX + hashlib.sha256(data).hexdigest()
+
+
+_BLAKE3_PREFIX = "blake3:"
+
 
+def blake3_prefixed(data: bytes) -> str:
+    return _BLAKE3_PREFIX + _blake3(data).hexdigest()
 
-def hash_json(obj: Any) -> str:
-    return sha256_prefixed(canonical_json_bytes(obj))
+
+def hash_json(obj: Any, algorithm: str = "sha256") -> str:
+    """
+    Prefixed hash of the canonical JSON of obj ("sha256" or "blake3").
+    """
+    data = canonical_json_bytes(obj, check_non_finite=True)
+    if algorithm == "blake3":
+        return blake3_prefixed(data)
+    if algorithm != "sha256":
+        raise ValueError(f"unsupported hash algorithm: {algorithm}")
+    return sha256_prefixed(data)
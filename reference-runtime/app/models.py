@@ -1,15 +1,22 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Annotated, Any, Callable, Dict, List, Optional
 
-from pydantic import BaseModel, Field, ConfigDict, model_validator
+import msgspec
 
 
 # ----------------------------
 # Common config: strict + no surprises
 # ----------------------------
-STRICT = ConfigDict(extra="forbid", frozen=True)
+class StrictStruct(msgspec.Struct, frozen=True, forbid_unknown_fields=True):
+    """
+    Unknown fields are rejected and instances are immutable.
+    JSON parsing and schema validation happen in a single decode pass.
+    """
+
+
+NonEmptyStr = Annotated[str, msgspec.Meta(min_length=1)]
 
 
 # ----------------------------
@@ -38,46 +45,34 @@ class ReasonCode(str, Enum):
 # ----------------------------
 # Execution Request
 # ----------------------------
-class Actor(BaseModel):
-    model_config = STRICT
-
-    principal_id: str = Field(min_length=1)
-    principal_type: str = Field(min_length=1)
-    attributes: Dict[str, str] = Field(default_factory=dict)
+class Actor(StrictStruct):
+    principal_id: NonEmptyStr
+    principal_type: NonEmptyStr
+    attributes: Dict[str, str] = msgspec.field(default_factory=dict)
 
 
-class ToolCall(BaseModel):
-    model_config = STRICT
-
-    name: str = Field(min_length=1)
+class ToolCall(StrictStruct):
+    name: NonEmptyStr
     args: Any  # Opaque to ECL (but must be JSON-serializable for hashing)
 
 
-class ProfileRef(BaseModel):
-    model_config = STRICT
-
-    id: str = Field(min_length=1)
-    version: str = Field(min_length=1)
-
+class ProfileRef(StrictStruct):
+    id: NonEmptyStr
+    version: NonEmptyStr
 
-class Context(BaseModel):
-    model_config = STRICT
 
+class Context(StrictStruct):
     snapshot: Any  # Hashable JSON (we’ll canonicalize + hash it)
-    snapshot_hash: str = Field(min_length=1)  # e.g. "sha256:<hex>"
+    snapshot_hash: NonEmptyStr  # e.g. "sha256:<hex>"
 
 
-class Controls(BaseModel):
-    model_config = STRICT
-
+class Controls(StrictStruct):
     approval_token: Optional[str] = None
     nonce: Optional[str] = None
 
 
-class ExecutionRequest(BaseModel):
-    model_config = STRICT
-
-    request_id: str = Field(min_length=1)
+class ExecutionRequest(StrictStruct):
+    request_id: NonEmptyStr
     actor: Actor
     tool: ToolCall
     profile: ProfileRef
@@ -91,53 +86,68 @@ class ExecutionRequest(BaseModel):
 # ----------------------------
 # Execution Profile (static input)
 # ----------------------------
-class RequiredControls(BaseModel):
-    model_config = STRICT
+class ProfileStruct(msgspec.Struct, forbid_unknown_fields=True, dict=True):
+    """
+    Static profile types: validated as strictly as StrictStruct, but not
+    frozen, so profiles.load_profile can attach precomputed state directly.
+    That state is set per instance; the class-level None defaults are only
+    there so an unprepared profile fails loudly (-> INTERNAL_ERROR). Its
+    annotations are for type checkers only, so it is never part of the schema.
+    """
 
-    approval_token: bool = False
 
+class RequiredControls(ProfileStruct):
+    approval_token: bool = False
 
-class ArgRule(BaseModel):
-    model_config = STRICT
 
-    path: str = Field(min_length=1)      # e.g. "$.to"
-    type: str = Field(min_length=1)      # "string", "number", "bool"
+class ArgRule(ProfileStruct):
+    path: NonEmptyStr                    # e.g. "$.to"
+    type: NonEmptyStr                    # "string", "number", "bool"
     pattern: Optional[str] = None        # regex
     max_len: Optional[int] = None
     enum: Optional[List[str]] = None
     min: Optional[float] = None
     max: Optional[float] = None
 
+    # Set by profiles.load_profile (not part of the profile schema)
+    if TYPE_CHECKING:
+        _key: Optional[str]  # "$.to" -> "to"; None if unsupported
+        _compiled: Optional[Any]  # compiled re pattern
+    _key = None
+    _compiled = None
 
-class Constraints(BaseModel):
-    model_config = STRICT
-
-    arg_rules: List[ArgRule] = Field(default_factory=list)
 
+class Constraints(ProfileStruct):
+    arg_rules: List[ArgRule] = msgspec.field(default_factory=list)
 
-class ToolPermit(BaseModel):
-    model_config = STRICT
 
-    name: str = Field(min_length=1)
-    required_controls: RequiredControls = Field(default_factory=RequiredControls)
+class ToolPermit(ProfileStruct):
+    name: NonEmptyStr
+    required_controls: RequiredControls = msgspec.field(default_factory=RequiredControls)
     constraints: Optional[Constraints] = None
 
+    # Set by profiles.load_profile (not part of the profile schema)
+    if TYPE_CHECKING:
+        _checker: Optional[Callable[[Any], Optional[ReasonCode]]]
+    _checker = None
 
-class ExecutionProfile(BaseModel):
-    model_config = STRICT
 
-    profile_id: str = Field(min_length=1)
-    profile_version: str = Field(min_length=1)
-    allowed_tools: List[ToolPermit] = Field(default_factory=list)
+class ExecutionProfile(ProfileStruct):
+    profile_id: NonEmptyStr
+    profile_version: NonEmptyStr
+    allowed_tools: List[ToolPermit] = msgspec.field(default_factory=list)
 
     # MUST be "DENY" (we fail-closed if profile says otherwise)
     default: str = "DENY"
 
-    @model_validator(mode="after")
-    def _default_must_be_deny(self) -> "ExecutionProfile":
+    # Set by profiles.load_profile (not part of the profile schema)
+    if TYPE_CHECKING:
+        _tools_by_name: Optional[Dict[str, ToolPermit]]
+    _tools_by_name = None
+
+    def __post_init__(self) -> None:
         if self.default != "DENY":
             raise ValueError("profile.default must be DENY")
-        return self
 
 
 # ----------------------------
@@ -149,37 +159,34 @@ class DecisionType(str, Enum):
     ESCALATE = "ESCALATE"  # blocks execution
 
 
-class RuntimeMeta(BaseModel):
-    model_config = STRICT
-
-    name: str = Field(min_length=1)
-    version: str = Field(min_length=1)
-    build: str = Field(min_length=1)  # git sha or build id
-
+class RuntimeMeta(StrictStruct):
+    name: NonEmptyStr
+    version: NonEmptyStr
+    build: NonEmptyStr  # git sha or build id
 
-class DecisionProfileInfo(BaseModel):
-    model_config = STRICT
 
-    id: str = Field(min_length=1)
-    version: str = Field(min_length=1)
-    profile_ref_hash: str = Field(min_length=1)  # sha256 of canonical profile bytes
+class DecisionProfileInfo(StrictStruct):
+    id: NonEmptyStr
+    version: NonEmptyStr
+    profile_ref_hash: NonEmptyStr  # sha256 of canonical profile bytes
 
 
-class ApprovedCall(BaseModel):
-    model_config = STRICT
-
-    tool_name: str = Field(min_length=1)
+class ApprovedCall(StrictStruct):
+    tool_name: NonEmptyStr
     tool_args: Any
 
 
-class ExecutionDecision(BaseModel):
-    model_config = STRICT
+class ExecutionDecision(StrictStruct):
+    """
+    Gate output. A Struct so the response is encoded straight from the
+    decision, without building an intermediate dict.
+    """
 
     decision_type: DecisionType
     reason_code: ReasonCode
 
-    request_hash: str = Field(min_length=1)
-    provenance_id: str = Field(min_length=1)
+    request_hash: NonEmptyStr
+    provenance_id: NonEmptyStr
 
     profile: DecisionProfileInfo
     runtime: RuntimeMeta
@@ -187,50 +194,42 @@ class ExecutionDecision(BaseModel):
     # Present ONLY if decision_type == ALLOW
     approved_call: Optional[ApprovedCall] = None
 
-    @model_validator(mode="after")
-    def _allow_requires_approved_call(self) -> "ExecutionDecision":
+    def __post_init__(self) -> None:
         if self.decision_type == DecisionType.ALLOW and self.approved_call is None:
             raise ValueError("ALLOW requires approved_call")
         if self.decision_type != DecisionType.ALLOW and self.approved_call is not None:
             raise ValueError("approved_call must be absent unless ALLOW")
-        return self
 
 
 # ----------------------------
 # Audit record (append-only)
 # ----------------------------
-class AuditTimestamps(BaseModel):
-    model_config = STRICT
-
+class AuditTimestamps(StrictStruct):
     received_at: str
     decided_at: str
     logged_at: str
 
 
-class AuditIntegrity(BaseModel):
-    model_config = STRICT
-
-    prev_hash: str = Field(min_length=1)
-    record_hash: str = Field(min_length=1)
+class AuditIntegrity(StrictStruct):
+    prev_hash: NonEmptyStr
+    record_hash: NonEmptyStr
 
 
-class AuditRecord(BaseModel):
-    model_config = STRICT
+class AuditRecord(StrictStruct, kw_only=True):
+    provenance_id: NonEmptyStr
+    seq: Annotated[int, msgspec.Meta(ge=0)] = 0  # assigned by the audit writer
 
-    provenance_id: str = Field(min_length=1)
-    seq: int = Field(ge=0)
-
-    request_id: str = Field(min_length=1)
-    request_hash: str = Field(min_length=1)
-
-    profile_id: str = Field(min_length=1)
-    profile_version: str = Field(min_length=1)
-    profile_ref_hash: str = Field(min_length=1)
+    request_id: NonEmptyStr
+    request_hash: NonEmptyStr
 
     decision_type: DecisionType
     reason_code: ReasonCode
+    approved_call: Optional[ApprovedCall] = None
+
+    profile_id: NonEmptyStr
+    profile_version: NonEmptyStr
+    profile_ref_hash: NonEmptyStr
 
     runtime: RuntimeMeta
     timestamps: AuditTimestamps
-    integrity: AuditIntegrity
-
+    integrity: Optional[AuditIntegrity] = None  # assigned by the audit writer
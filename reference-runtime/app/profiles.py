@@ -1,35 +1,58 @@
 from __future__ import annotations
 
+import functools
 import os
-from typing import Tuple
+import re
+from typing import Optional, Tuple
 
-from pydantic import ValidationError
+import msgspec
 
+from .enforce import arg_key, build_constraint_checker
 from .hashing import sha256_prefixed
 from .models import ExecutionProfile, ReasonCode
 
 
-def _profiles_root() -> str:
+_PROFILE_DEC = msgspec.json.Decoder(ExecutionProfile)
+
+
+def profiles_root_from_env() -> str:
     return os.getenv("PROFILES_ROOT", "profiles")
 
 
-def profile_path(profile_id: str, profile_version: str) -> str:
+def profile_path(profile_id: str, profile_version: str, root: Optional[str] = None) -> str:
     # profiles/{id}/{version}.json
-    root = _profiles_root()
+    if root is None:
+        root = profiles_root_from_env()
     return os.path.join(root, profile_id, f"{profile_version}.json")
 
 
-def load_profile(profile_id: str, profile_version: str) -> Tuple[ExecutionProfile, str]:
+def load_profile(
+    profile_id: str, profile_version: str, root: Optional[str] = None
+) -> Tuple[ExecutionProfile, str]:
     """
     Returns (profile_model, profile_ref_hash).
+    root defaults to PROFILES_ROOT; the gate passes its Settings.profiles_root.
     Fail closed:
       - missing file => PROFILE_NOT_FOUND
       - parse/validation error => PROFILE_PARSE_ERROR
+
+    Parsed profiles are cached per (path, mtime, size), so an unchanged file
+    costs one stat per request and an edited file is picked up on the next one.
     """
-    path = profile_path(profile_id, profile_version)
-    if not os.path.exists(path):
+    path = profile_path(profile_id, profile_version, root)
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):  # ValueError: e.g. NUL in the id
         raise RuntimeError(ReasonCode.PROFILE_NOT_FOUND.value)
 
+    return _load_profile_file(path, st.st_mtime_ns, st.st_size, profile_id, profile_version)
+
+
+@functools.lru_cache(maxsize=256)
+def _load_profile_file(
+    path: str, mtime_ns: int, size: int, profile_id: str, profile_version: str
+) -> Tuple[ExecutionProfile, str]:
+    # mtime_ns / size only key the cache; failures raise and are not cached
     try:
         with open(path, "rb") as f:
             raw = f.read()
@@ -41,7 +64,7 @@ def load_profile(profile_id: str, profile_version: str) -> Tuple[ExecutionProfil
     profile_ref_hash = sha256_prefixed(raw)
 
     try:
-        profile = ExecutionProfile.model_validate_json(raw.decode("utf-8"))
+        profile = _PROFILE_DEC.decode(raw)
     except Exception:
         raise RuntimeError(ReasonCode.PROFILE_PARSE_ERROR.value)
 
@@ -49,4 +72,34 @@ def load_profile(profile_id: str, profile_version: str) -> Tuple[ExecutionProfil
     if profile.profile_id != profile_id or profile.profile_version != profile_version:
         raise RuntimeError(ReasonCode.PROFILE_PARSE_ERROR.value)
 
+    _prepare_profile(profile)
+
     return profile, profile_ref_hash
+
+
+def _prepare_profile(profile: ExecutionProfile) -> None:
+    """
+    Profiles are static, so precompute what enforcement needs per request:
+      - tool name -> permit index (first entry wins, as with a linear scan)
+      - the bare arg key of each ArgRule path
+      - compiled regex for each ArgRule pattern
+      - a generated constraint checker per permit
+    An uncompilable pattern is a malformed profile => PROFILE_PARSE_ERROR.
+    """
+    tools_by_name = {}
+    for permit in profile.allowed_tools:
+        tools_by_name.setdefault(permit.name, permit)
+
+        rules = permit.constraints.arg_rules if permit.constraints else []
+        for rule in rules:
+            rule._key = arg_key(rule.path)
+            if rule.pattern is None:
+                continue
+            try:
+                rule._compiled = re.compile(rule.pattern)
+            except re.error:
+                raise RuntimeError(ReasonCode.PROFILE_PARSE_ERROR.value)
+
+        permit._checker = build_constraint_checker(permit)
+
+    profile._tools_by_name = tools_by_name
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from fastapi import Request
+
+from .audit import AuditSink, FileAuditSink
+from .profiles import profiles_root_from_env
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """
+    Runtime configuration, fixed when the app is built.
+    Nothing on the request path reads the environment.
+    """
+    profiles_root: str
+    audit_sink: AuditSink
+
+    @classmethod
+    def from_env(cls) -> Settings:
+        # PROFILES_ROOT / AUDIT_LOG_PATH, read once
+        return cls(profiles_root=profiles_root_from_env(), audit_sink=FileAuditSink())
+
+
+def get_settings(request: Request) -> Settings:
+    return request.app.state.settings
+
+
+def get_audit_sink(request: Request) -> AuditSink:
+    """
+    FastAPI dependency for the audit destination (overridable, e.g. in tests).
+    """
+    return get_settings(request).audit_sink
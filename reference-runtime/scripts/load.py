@@ -1,8 +1,8 @@
 import argparse
 import asyncio
 import json
+import secrets
 import time
-import uuid
 from typing import Tuple, List
 
 import httpx
@@ -17,6 +17,18 @@ REQ_TEMPLATE = {
     "controls": {},
 }
 
+# Random per run, so repeated runs against one server never replay request
+# IDs (and hit the provenance cache the way real traffic would not).
+_RUN_ID = secrets.token_hex(4)
+
+# Pre-serialized body with the request_id value left open after the run ID;
+# workers only splice in a counter-based suffix (no uuid4 / json.dumps per
+# request).
+_BODY_PREFIX = (
+    json.dumps(REQ_TEMPLATE, separators=(",", ":"))[:-1] + ',"request_id":"' + _RUN_ID + "-"
+).encode("utf-8")
+_BODY_SUFFIX = b'"}'
+
 
 def _percentile(sorted_vals: List[float], pct: float) -> float:
     if not sorted_vals:
@@ -33,20 +45,20 @@ def _percentile(sorted_vals: List[float], pct: float) -> float:
     return sorted_vals[f] + (sorted_vals[c] - sorted_vals[f]) * (k - f)
 
 
-async def worker(client: httpx.AsyncClient, url: str, n: int) -> Tuple[int, int, List[float]]:
+async def worker(client: httpx.AsyncClient, url: str, n: int, worker_id: int) -> Tuple[int, int, List[float]]:
     ok = 0
     fail = 0
     lats: List[float] = []
 
     headers = {"content-type": "application/json"}
+    id_prefix = f"w{worker_id}-".encode("utf-8")
 
-    for _ in range(n):
-        req = dict(REQ_TEMPLATE)
-        req["request_id"] = str(uuid.uuid4())
+    for i in range(n):
+        body = _BODY_PREFIX + id_prefix + str(i).encode("utf-8") + _BODY_SUFFIX
 
         t0 = time.perf_counter()
         try:
-            r = await client.post(url, content=json.dumps(req), headers=headers)
+            r = await client.post(url, content=body, headers=headers)
             dt = (time.perf_counter() - t0) * 1000.0  # ms
             lats.append(dt)
 
@@ -74,11 +86,13 @@ async def main():
     per = args.requests // args.concurrency
     remainder = args.requests % args.concurrency
 
-    # Benchmark-friendly HTTP client configuration
+    # Benchmark-friendly HTTP client configuration.
+    # Workers send sequentially, so one kept-alive connection per worker is
+    # enough: no connection churn or extra handshakes in the measurement.
     timeout = httpx.Timeout(connect=5.0, read=60.0, write=60.0, pool=60.0)
     limits = httpx.Limits(
-        max_connections=max(100, args.concurrency * 2),
-        max_keepalive_connections=max(20, args.concurrency),
+        max_connections=args.concurrency,
+        max_keepalive_connections=args.concurrency,
         keepalive_expiry=30.0,
     )
 
@@ -87,7 +101,7 @@ async def main():
         tasks = []
         for i in range(args.concurrency):
             n = per + (1 if i < remainder else 0)
-            tasks.append(asyncio.create_task(worker(client, args.url, n)))
+            tasks.append(asyncio.create_task(worker(client, args.url, n, i)))
 
         results = await asyncio.gather(*tasks)
         t1 = time.time()
@@ -0,0 +1,138 @@
+import os
+import pathlib
+from types import MappingProxyType
+
+import httpx
+import msgspec
+import pytest
+
+from app.audit import InMemoryAuditSink
+from app.gate import create_app
+from app.hashing import hash_json
+from app.settings import Settings, get_audit_sink
+
+# Resolved once for the whole run; test modules use the profiles_dir fixture.
+# abspath is string-only (no per-component stat as with Path.resolve()).
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SNAPSHOT = {"x": 1}
+
+# Shared by every test request (via the base_req fixture). Read-only, down to
+# the fragments, so no test can leak a change into another.
+_BASE_REQ = MappingProxyType({
+    "actor": MappingProxyType(
+        {"principal_id": "user:1", "principal_type": "user", "attributes": MappingProxyType({})}
+    ),
+    "profile": MappingProxyType({"id": "example", "version": "1.0.0"}),
+    "context": MappingProxyType({"snapshot": _SNAPSHOT, "snapshot_hash": hash_json(_SNAPSHOT)}),
+    "controls": MappingProxyType({}),
+})
+
+# An ALLOW through the example profile: exercises every stage of the gate
+_WARMUP_REQ = {
+    **_BASE_REQ,
+    "request_id": "warmup",
+    "tool": {"name": "email.send", "args": {"to": "a@example.com", "subject": "w"}},
+}
+
+
+def _encode_frozen(obj):
+    # Shared request fragments are read-only MappingProxyType views
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise NotImplementedError
+
+
+# Request bodies are encoded by msgspec (keys kept in dict order, so tests can
+# still send deliberately reordered requests)
+_REQ_ENC = msgspec.json.Encoder(enc_hook=_encode_frozen)
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
+@pytest.fixture(scope="session")
+def base_req() -> MappingProxyType:
+    """
+    Base request payload; tests spread it and add request_id / tool.
+    """
+    return _BASE_REQ
+
+
+@pytest.fixture(scope="session")
+def profiles_dir() -> pathlib.Path:
+    return pathlib.Path(REPO_ROOT, "profiles")
+
+
+def _asgi_client(app) -> httpx.AsyncClient:
+    # Drives the ASGI app in-process on the test's event loop (no portal thread)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.fixture(scope="session")
+def app(profiles_dir):
+    # One app for the whole run, configured directly rather than through env
+    return create_app(
+        Settings(profiles_root=str(profiles_dir), audit_sink=InMemoryAuditSink(maxlen=1024))
+    )
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    # Session-wide, so the session client below can be an async fixture
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def _session_client(app):
+    async with _asgi_client(app) as client:
+        # Warm-up: route resolution, profile load + checker build and the codecs
+        # happen here rather than inside the first test. Audited into the
+        # app's own sink, which tests never read.
+        resp = await client.post(
+            "/v1/execute", content=_REQ_ENC.encode(_WARMUP_REQ), headers=_JSON_HEADERS
+        )
+        assert msgspec.json.decode(resp.content)["decision_type"] == "ALLOW"
+        yield client
+
+
+@pytest.fixture()
+def audit_sink(app):
+    # Fresh chain per test, no disk I/O
+    sink = InMemoryAuditSink(maxlen=1024)
+    app.dependency_overrides[get_audit_sink] = lambda: sink
+    yield sink
+    app.dependency_overrides.pop(get_audit_sink, None)
+
+
+@pytest.fixture()
+def client(_session_client, audit_sink):
+    return _session_client
+
+
+@pytest.fixture()
+def execute(client):
+    """
+    POST a request to /v1/execute, on the session client unless another
+    one (e.g. from make_client) is given.
+    """
+    async def post(req, via: httpx.AsyncClient = client) -> httpx.Response:
+        return await via.post("/v1/execute", content=_REQ_ENC.encode(req), headers=_JSON_HEADERS)
+
+    return post
+
+
+@pytest.fixture()
+async def make_client(audit_sink):
+    """
+    Factory for a client on a fresh app reading profiles from another root.
+    Decisions are audited into this test's audit_sink.
+    """
+    clients = []
+
+    def make(profiles_root) -> httpx.AsyncClient:
+        app = create_app(Settings(profiles_root=str(profiles_root), audit_sink=audit_sink))
+        clients.append(_asgi_client(app))
+        return clients[-1]
+
+    yield make
+    for c in clients:
+        await c.aclose()
@@ -1,14 +1,15 @@
+import asyncio
 import json
 import pathlib
 import hashlib
 
-from fastapi.testclient import TestClient
+import pytest
 
-from app.gate import create_app
-from app.hashing import canonical_json_bytes, hash_json
+from app.audit import AuditWriter, FileAuditSink, _get_writer
+from app.hashing import canonical_json_bytes
+from app.models import AuditRecord, AuditTimestamps, DecisionType, ReasonCode, RuntimeMeta
 
-REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
-PROFILES_DIR = str(REPO_ROOT / "profiles")
+pytestmark = pytest.mark.anyio
 
 
 def _read_lines(path: pathlib.Path):
@@ -17,8 +18,23 @@ def _read_lines(path: pathlib.Path):
     return [line for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
 
 
+def _record(request_id: str) -> AuditRecord:
+    return AuditRecord(
+        provenance_id="prov",
+        request_id=request_id,
+        request_hash="sha256:00",
+        decision_type=DecisionType.DENY,
+        reason_code=ReasonCode.INTERNAL_ERROR,
+        profile_id="UNKNOWN",
+        profile_version="UNKNOWN",
+        profile_ref_hash="sha256:00",
+        runtime=RuntimeMeta(name="test", version="0", build="test"),
+        timestamps=AuditTimestamps(received_at="t", decided_at="t", logged_at="t"),
+    )
+
+
 def _record_hash(record: dict) -> str:
-    # Must match app.audit.append_audit_record
+    # Must match app.audit._chain_records
     r = dict(record)
     integrity = dict(r["integrity"])
     integrity["record_hash"] = ""
@@ -27,44 +43,111 @@ def _record_hash(record: dict) -> str:
     return "sha256:" + h
 
 
-def test_audit_hash_chain_links_and_verifies(tmp_path, monkeypatch):
-    audit_path = tmp_path / "audit.log"
-    monkeypatch.setenv("AUDIT_LOG_PATH", str(audit_path))
-    monkeypatch.setenv("PROFILES_ROOT", PROFILES_DIR)
-
-    client = TestClient(create_app())
-
-    base_req = {
-        "actor": {"principal_id": "user:1", "principal_type": "user", "attributes": {}},
-        "profile": {"id": "example", "version": "1.0.0"},
-        "context": {"snapshot": {"x": 1}, "snapshot_hash": hash_json({"x": 1})},
-        "controls": {},
+async def test_audit_hash_chain_links_and_verifies(base_req, execute, audit_sink):
+    r1 = {**base_req, "request_id": "audit_1", "tool": {"name": "db.drop_all", "args": {"sure": True}}}
+    r2 = {
+        **base_req,
+        "request_id": "audit_2",
+        "tool": {"name": "email.send", "args": {"to": "bob@example.com", "subject": "hi"}},
     }
 
-    r1 = dict(base_req)
-    r1["request_id"] = "audit_1"
-    r1["tool"] = {"name": "db.drop_all", "args": {"sure": True}}
+    await execute(r1)
+    await execute(r2)
 
-    r2 = dict(base_req)
-    r2["request_id"] = "audit_2"
-    r2["tool"] = {"name": "email.send", "args": {"to": "bob@example.com", "subject": "hi"}}
+    recs = audit_sink.records()
+    assert len(recs) == 2
 
-    client.post("/v1/execute", content=json.dumps(r1), headers={"content-type": "application/json"})
-    client.post("/v1/execute", content=json.dumps(r2), headers={"content-type": "application/json"})
-
-    lines = _read_lines(audit_path)
-    assert len(lines) == 2
-
-    rec1 = json.loads(lines[0])
-    rec2 = json.loads(lines[1])
+    rec1, rec2 = recs
 
     # seq must increment deterministically
     assert rec1["seq"] == 0
     assert rec2["seq"] == 1
 
+    # logged_at is stamped when the record is written, after the decision
+    for rec in recs:
+        ts = rec["timestamps"]
+        assert ts["received_at"] <= ts["decided_at"] <= ts["logged_at"]
+
     # chain must link
     assert rec2["integrity"]["prev_hash"] == rec1["integrity"]["record_hash"]
 
     # record_hash must verify (tamper-evident)
     assert rec1["integrity"]["record_hash"] == _record_hash(rec1)
     assert rec2["integrity"]["record_hash"] == _record_hash(rec2)
+
+
+async def test_concurrent_audit_submissions_form_one_chain(tmp_path):
+    audit_path = tmp_path / "audit.log"
+    sink = FileAuditSink(str(audit_path))
+
+    results = await asyncio.gather(*(sink.submit(_record(f"batch_{i}")) for i in range(50)))
+
+    # Every waiter got its own slot in the chain
+    assert sorted(r.seq for r in results) == list(range(50))
+
+    recs = [json.loads(line) for line in _read_lines(audit_path)]
+    assert [rec["seq"] for rec in recs] == list(range(50))
+    for prev, rec in zip(recs, recs[1:]):
+        assert rec["integrity"]["prev_hash"] == prev["integrity"]["record_hash"]
+    for rec in recs:
+        assert rec["integrity"]["record_hash"] == _record_hash(rec)
+
+
+async def test_close_drains_record_of_cancelled_handler(tmp_path):
+    audit_path = tmp_path / "audit.log"
+    sink = FileAuditSink(str(audit_path))
+
+    # Hold the file writer so the record is still queued when the waiting
+    # handler goes away (e.g. client disconnect)
+    writer_lock = _get_writer(str(audit_path))._lock
+    writer_lock.acquire()
+    waiter = asyncio.ensure_future(sink.submit(_record("drain")))
+    await asyncio.sleep(0)
+    waiter.cancel()
+
+    # Close must block until the queued record is written
+    closing = asyncio.ensure_future(sink.aclose())
+    await asyncio.sleep(0.01)
+    assert not closing.done()
+    writer_lock.release()
+    await closing
+
+    recs = [json.loads(line) for line in _read_lines(audit_path)]
+    assert [rec["request_id"] for rec in recs] == ["drain"]
+
+
+def test_new_writer_resumes_existing_chain(tmp_path):
+    audit_path = tmp_path / "audit.log"
+    path = str(audit_path)
+
+    record = _record("resume")
+
+    first = AuditWriter(path).append(record)
+    # Fresh writer on the same file, as after a restart
+    second = AuditWriter(path).append(record)
+
+    assert second.seq == first.seq + 1
+    assert second.prev_hash == first.record_hash
+
+
+def test_short_writes_are_completed(tmp_path):
+    audit_path = tmp_path / "audit.log"
+    writer = AuditWriter(str(audit_path))
+
+    class ShortWriteFile:
+        # Writes at most 7 bytes per call, like a signal-interrupted write
+        def __init__(self, fh):
+            self.fh = fh
+
+        def write(self, data):
+            return self.fh.write(data[:7])
+
+        def flush(self):
+            self.fh.flush()
+
+    writer._fh = ShortWriteFile(writer._fh)
+    writer.append_many([_record("short_1"), _record("short_2")])
+
+    recs = [json.loads(line) for line in _read_lines(audit_path)]
+    assert [rec["request_id"] for rec in recs] == ["short_1", "short_2"]
+    assert recs[1]["integrity"]["prev_hash"] == recs[0]["integrity"]["record_hash"]
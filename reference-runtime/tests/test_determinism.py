@@ -1,22 +1,16 @@
 import json
-import pathlib
 import hashlib
 
-from fastapi.testclient import TestClient
+import msgspec
+import pytest
 
-from app.gate import create_app
-from app.hashing import hash_json
+from app.hashing import canonical_json_bytes, hash_json
 
-REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
-PROFILES_DIR = str(REPO_ROOT / "profiles")
+pytestmark = pytest.mark.anyio
 
 
-def _post(client: TestClient, req: dict) -> dict:
-    return client.post(
-        "/v1/execute",
-        content=json.dumps(req),
-        headers={"content-type": "application/json"},
-    ).json()
+async def _post(execute, req: dict) -> dict:
+    return msgspec.json.decode((await execute(req)).content)
 
 
 def _decision_fingerprint(d: dict) -> dict:
@@ -32,77 +26,106 @@ def _decision_fingerprint(d: dict) -> dict:
     }
 
 
-def test_same_request_same_decision(tmp_path, monkeypatch):
-    monkeypatch.setenv("AUDIT_LOG_PATH", str(tmp_path / "audit.log"))
-    monkeypatch.setenv("PROFILES_ROOT", PROFILES_DIR)
-
-    client = TestClient(create_app())
-
+async def test_same_request_same_decision(base_req, execute):
     req = {
+        **base_req,
         "request_id": "req_det_1",
-        "actor": {"principal_id": "user:1", "principal_type": "user", "attributes": {}},
         "tool": {"name": "email.send", "args": {"to": "bob@example.com", "subject": "hi"}},
-        "profile": {"id": "example", "version": "1.0.0"},
-        "context": {"snapshot": {"x": 1}, "snapshot_hash": hash_json({"x": 1})},
-        "controls": {},
     }
 
-    d1 = _post(client, req)
-    d2 = _post(client, req)
+    d1 = await _post(execute, req)
+    d2 = await _post(execute, req)
 
     assert _decision_fingerprint(d1) == _decision_fingerprint(d2)
 
 
-def test_canonicalization_key_order_irrelevant(tmp_path, monkeypatch):
-    monkeypatch.setenv("AUDIT_LOG_PATH", str(tmp_path / "audit.log"))
-    monkeypatch.setenv("PROFILES_ROOT", PROFILES_DIR)
-
-    client = TestClient(create_app())
-
+async def test_canonicalization_key_order_irrelevant(base_req, execute):
     req_a = {
+        **base_req,
         "request_id": "req_det_2",
-        "actor": {"principal_id": "user:1", "principal_type": "user", "attributes": {}},
         "tool": {"name": "email.send", "args": {"subject": "hi", "to": "bob@example.com"}},
-        "profile": {"id": "example", "version": "1.0.0"},
-        "context": {"snapshot": {"x": 1}, "snapshot_hash": hash_json({"x": 1})},
-        "controls": {},
     }
 
     # Same semantics, different key order across the whole request
+    ctx = base_req["context"]
     req_b = {
         "profile": {"version": "1.0.0", "id": "example"},
         "tool": {"args": {"to": "bob@example.com", "subject": "hi"}, "name": "email.send"},
         "actor": {"attributes": {}, "principal_type": "user", "principal_id": "user:1"},
         "controls": {},
-        "context": {"snapshot_hash": hash_json({"x": 1}), "snapshot": {"x": 1}},
+        "context": {"snapshot_hash": ctx["snapshot_hash"], "snapshot": ctx["snapshot"]},
         "request_id": "req_det_2",
     }
 
-    d1 = _post(client, req_a)
-    d2 = _post(client, req_b)
+    d1 = await _post(execute, req_a)
+    d2 = await _post(execute, req_b)
 
     assert _decision_fingerprint(d1) == _decision_fingerprint(d2)
 
 
-def test_profile_ref_hash_binds_to_exact_profile_bytes(tmp_path, monkeypatch):
-    monkeypatch.setenv("AUDIT_LOG_PATH", str(tmp_path / "audit.log"))
-    monkeypatch.setenv("PROFILES_ROOT", PROFILES_DIR)
-
-    client = TestClient(create_app())
-
+async def test_profile_ref_hash_binds_to_exact_profile_bytes(base_req, execute, profiles_dir):
     req = {
+        **base_req,
         "request_id": "req_det_3",
-        "actor": {"principal_id": "user:1", "principal_type": "user", "attributes": {}},
         "tool": {"name": "email.send", "args": {"to": "bob@example.com", "subject": "hi"}},
-        "profile": {"id": "example", "version": "1.0.0"},
-        "context": {"snapshot": {"x": 1}, "snapshot_hash": hash_json({"x": 1})},
-        "controls": {},
     }
 
-    d = _post(client, req)
+    d = await _post(execute, req)
 
-    profile_path = REPO_ROOT / "profiles" / "example" / "1.0.0.json"
+    profile_path = profiles_dir / "example" / "1.0.0.json"
     raw = profile_path.read_bytes()
     expected = "sha256:" + hashlib.sha256(raw).hexdigest()
 
     assert d["profile"]["profile_ref_hash"] == expected
+
+
+async def test_snapshot_hash_accepts_exponent_floats(base_req, execute):
+    snapshot = {"big": 1e16, "small": 1e-7, "plain": 0.5}
+    req = {
+        **base_req,
+        "request_id": "req_det_4",
+        "tool": {"name": "email.send", "args": {"to": "bob@example.com", "subject": "hi"}},
+        "context": {"snapshot": snapshot, "snapshot_hash": hash_json(snapshot)},
+    }
+
+    d = await _post(execute, req)
+
+    assert d["decision_type"] == "ALLOW"
+
+
+async def test_snapshot_hash_accepts_blake3(base_req, execute):
+    snapshot = {"x": 1}
+    req = {
+        **base_req,
+        "request_id": "req_det_5",
+        "tool": {"name": "email.send", "args": {"to": "bob@example.com", "subject": "hi"}},
+        "context": {"snapshot": snapshot, "snapshot_hash": hash_json(snapshot, "blake3")},
+    }
+
+    d = await _post(execute, req)
+
+    assert d["decision_type"] == "ALLOW"
+
+    # A BLAKE3 digest under the sha256 prefix must not verify
+    req["context"] = {"snapshot": snapshot, "snapshot_hash": "sha256:" + hash_json(snapshot, "blake3")[7:]}
+    d = await _post(execute, req)
+
+    assert d["reason_code"] == "CTX_HASH_MISMATCH"
+
+
+def test_canonical_float_form_is_python_repr():
+    # Every magnitude band, including the ones msgspec renders differently
+    floats = [m * 10.0 ** e for e in range(-320, 300, 3) for m in (1.0, -1.5, 4.985049792910389)]
+    floats += [float("nan"), float("inf"), -float("inf")]
+    for f in floats:
+        obj = {"v": [f, {"w": f}]}
+        expected = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        assert canonical_json_bytes(obj, check_non_finite=True) == expected
+
+    # Non-finite floats must not collide with null
+    assert hash_json({"x": float("nan")}) != hash_json({"x": None})
+
+    # Non-str keys are sorted and stringified exactly as json.dumps does
+    obj = {10: "a", 2: "b"}
+    expected = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    assert canonical_json_bytes(obj) == expected
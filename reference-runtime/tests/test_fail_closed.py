@@ -1,47 +1,39 @@
-import json
-import os
-
+import msgspec
 import pytest
-from fastapi.testclient import TestClient
-
-from app.gate import create_app
-
-
-@pytest.fixture()
-def client(tmp_path, monkeypatch):
-    audit_path = tmp_path / "audit.log"
-    monkeypatch.setenv("AUDIT_LOG_PATH", str(audit_path))
-    app = create_app()
-    return TestClient(app)
-
-
-def read_audit_lines(path: str):
-    if not os.path.exists(path):
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        return [line.strip() for line in f.readlines() if line.strip()]
 
+pytestmark = pytest.mark.anyio
 
-def test_malformed_json_denies_and_writes_audit(tmp_path, monkeypatch):
-    audit_path = tmp_path / "audit.log"
-    monkeypatch.setenv("AUDIT_LOG_PATH", str(audit_path))
-
-    client = TestClient(create_app())
 
+async def test_malformed_json_denies_and_writes_audit(client, audit_sink):
     # Malformed JSON (missing closing brace)
-    resp = client.post("/v1/execute", data='{"bad": true', headers={"content-type": "application/json"})
+    resp = await client.post("/v1/execute", content='{"bad": true', headers={"content-type": "application/json"})
     assert resp.status_code == 200
 
-    body = resp.json()
+    body = msgspec.json.decode(resp.content)
     assert body["decision_type"] == "DENY"
     assert body["reason_code"] == "REQUEST_PARSE_ERROR"
     assert body["request_hash"].startswith("sha256:")
     assert body["provenance_id"].startswith("prov_")
 
-    lines = read_audit_lines(str(audit_path))
-    assert len(lines) == 1
+    recs = audit_sink.records()
+    assert len(recs) == 1
 
-    rec = json.loads(lines[0])
+    rec = recs[0]
     assert rec["decision_type"] == "DENY"
     assert rec["reason_code"] == "REQUEST_PARSE_ERROR"
     assert rec["request_hash"] == body["request_hash"]
+
+
+async def test_schema_invalid_vs_malformed_json(client, audit_sink):
+    # Well-formed JSON with the wrong shape
+    resp = await client.post("/v1/execute", content='{"request_id": 5}', headers={"content-type": "application/json"})
+    assert msgspec.json.decode(resp.content)["reason_code"] == "REQUEST_SCHEMA_INVALID"
+
+    # Schema error before the body turns out to be truncated: still a parse error
+    resp = await client.post("/v1/execute", content='{"request_id": 5, "bad', headers={"content-type": "application/json"})
+    assert msgspec.json.decode(resp.content)["reason_code"] == "REQUEST_PARSE_ERROR"
+
+    assert [rec["reason_code"] for rec in audit_sink.records()] == [
+        "REQUEST_SCHEMA_INVALID",
+        "REQUEST_PARSE_ERROR",
+    ]
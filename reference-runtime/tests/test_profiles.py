@@ -1,48 +1,99 @@
 import json
 import os
 
-from fastapi.testclient import TestClient
+import msgspec
+import pytest
 
-from app.gate import create_app
-from app.hashing import hash_json
+pytestmark = pytest.mark.anyio
 
 
-def read_audit_lines(path: str):
-    if not os.path.exists(path):
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        return [line.strip() for line in f.readlines() if line.strip()]
-
-
-def test_missing_profile_denies_profile_not_found(tmp_path, monkeypatch):
-    audit_path = tmp_path / "audit.log"
-    monkeypatch.setenv("AUDIT_LOG_PATH", str(audit_path))
-
+async def test_missing_profile_denies_profile_not_found(base_req, make_client, execute, audit_sink, tmp_path):
     # Point profiles root somewhere empty
     empty_profiles = tmp_path / "profiles"
     empty_profiles.mkdir()
-    monkeypatch.setenv("PROFILES_ROOT", str(empty_profiles))
-
-    client = TestClient(create_app())
+    client = make_client(empty_profiles)
 
     req = {
+        **base_req,
         "request_id": "req1",
-        "actor": {"principal_id": "user:1", "principal_type": "user", "attributes": {}},
         "tool": {"name": "email.send", "args": {"to": "a@example.com"}},
         "profile": {"id": "does_not_exist", "version": "1.0.0"},
-        "context": {"snapshot": {"x": 1}, "snapshot_hash": hash_json({"x": 1})},
-        "controls": {},
         "submitted_at": "2026-01-06T19:00:00Z",
     }
 
-    resp = client.post("/v1/execute", content=json.dumps(req), headers={"content-type": "application/json"})
+    resp = await execute(req, client)
     assert resp.status_code == 200
-    body = resp.json()
+    body = msgspec.json.decode(resp.content)
 
     assert body["decision_type"] == "DENY"
     assert body["reason_code"] == "PROFILE_NOT_FOUND"
 
-    lines = read_audit_lines(str(audit_path))
-    assert len(lines) == 1
-    rec = json.loads(lines[0])
-    assert rec["reason_code"] == "PROFILE_NOT_FOUND"
+    recs = audit_sink.records()
+    assert len(recs) == 1
+    assert recs[0]["reason_code"] == "PROFILE_NOT_FOUND"
+
+
+async def test_invalid_pattern_denies_profile_parse_error(base_req, make_client, execute, tmp_path):
+    profiles = tmp_path / "profiles"
+    (profiles / "bad_regex").mkdir(parents=True)
+    (profiles / "bad_regex" / "1.0.0.json").write_text(
+        json.dumps(
+            {
+                "profile_id": "bad_regex",
+                "profile_version": "1.0.0",
+                "allowed_tools": [
+                    {
+                        "name": "email.send",
+                        "constraints": {"arg_rules": [{"path": "$.to", "type": "string", "pattern": "(["}]},
+                    }
+                ],
+                "default": "DENY",
+            }
+        ),
+        encoding="utf-8",
+    )
+    client = make_client(profiles)
+
+    req = {
+        **base_req,
+        "request_id": "req2",
+        "tool": {"name": "email.send", "args": {"to": "a@example.com"}},
+        "profile": {"id": "bad_regex", "version": "1.0.0"},
+    }
+
+    resp = await execute(req, client)
+    body = msgspec.json.decode(resp.content)
+
+    assert body["decision_type"] == "DENY"
+    assert body["reason_code"] == "PROFILE_PARSE_ERROR"
+
+
+async def test_edited_profile_is_reloaded(base_req, make_client, execute, profiles_dir, tmp_path):
+    profiles = tmp_path / "profiles"
+    (profiles / "example").mkdir(parents=True)
+    path = profiles / "example" / "1.0.0.json"
+    raw = (profiles_dir / "example" / "1.0.0.json").read_bytes()
+    path.write_bytes(raw)
+    client = make_client(profiles)
+
+    req = {
+        **base_req,
+        "request_id": "req3",
+        "tool": {"name": "email.send", "args": {"to": "a@example.com", "subject": "hi"}},
+    }
+
+    first = msgspec.json.decode((await execute(req, client)).content)
+    assert first["decision_type"] == "ALLOW"
+
+    # Drop email.send; bump mtime explicitly so the change is visible even
+    # on filesystems with coarse timestamps
+    profile = json.loads(raw)
+    profile["allowed_tools"] = [t for t in profile["allowed_tools"] if t["name"] != "email.send"]
+    path.write_text(json.dumps(profile), encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    second = msgspec.json.decode((await execute(req, client)).content)
+    assert second["decision_type"] == "DENY"
+    assert second["reason_code"] == "TOOL_NOT_ALLOWED"
+    assert second["profile"]["profile_ref_hash"] != first["profile"]["profile_ref_hash"]